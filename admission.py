@@ -0,0 +1,144 @@
+import math, threading, time
+from collections import deque
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+class Job:
+    """One admitted submission waiting for, or going through, the API calls"""
+    __slots__ = ("user_id", "payload", "accepted_at", "status", "started_at", "finished_at", "error")
+
+    def __init__(self, user_id, payload, accepted_at):
+        self.user_id = user_id
+        self.payload = payload
+        self.accepted_at = accepted_at
+        self.status = QUEUED
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+class AdmissionController:
+    """FIFO admission queue with per-user dedupe and deadline-aware backpressure.
+
+    Submissions are accepted (and timestamped) when the user clicks, then
+    processed by a small pool of worker threads. A submission is refused
+    up front when its estimated completion would land more than
+    `grace_seconds` after the deadline, instead of failing at random later.
+    """
+
+    def __init__(self, process, workers=4, grace_seconds=60, initial_service_seconds=10.0, smoothing=0.2):
+        self.process = process
+        self.workers = workers
+        self.grace_seconds = grace_seconds
+        self.service_seconds = initial_service_seconds
+        self.smoothing = smoothing
+        self.queue = deque()
+        self.jobs = {}
+        self.running = 0
+        self.condition = threading.Condition()
+        self.threads = []
+
+    def _start_workers(self):
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"admission-worker-{len(self.threads)}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _wait_for_position(self, position):
+        """Expected seconds until the job at 1-based queue position finishes"""
+        rounds = math.ceil((position + self.running) / self.workers)
+        return rounds * self.service_seconds
+
+    def submit(self, user_id, payload, deadline=None, accepted_at=None):
+        """Admit a submission or explain why it was refused.
+
+        Returns (job, None) when queued or already known for this user and
+        (None, reason) when refused. Dedupe only applies within one challenge
+        run: a job left over from an earlier `payload["run_id"]` is replaced.
+        """
+        accepted_at = accepted_at if accepted_at is not None else time.time()
+        with self.condition:
+            if deadline and accepted_at > deadline:
+                return None, "Time's up! You can't submit now."
+
+            existing = self.jobs.get(user_id)
+            if (existing is not None and existing.status != FAILED
+                    and existing.payload.get("run_id") == payload.get("run_id")):
+                return existing, None
+
+            estimated_finish = accepted_at + self._wait_for_position(len(self.queue) + 1)
+            if deadline and estimated_finish > deadline + self.grace_seconds:
+                return None, "The evaluation queue is full for the time remaining. Please try again in a few seconds."
+
+            job = Job(user_id, payload, accepted_at)
+            self.jobs[user_id] = job
+            self.queue.append(job)
+            self._start_workers()
+            self.condition.notify()
+            return job, None
+
+    def get(self, user_id):
+        with self.condition:
+            return self.jobs.get(user_id)
+
+    def position(self, job):
+        """1-based place of a queued job, or 0 once it has left the queue"""
+        with self.condition:
+            if job.status != QUEUED:
+                return 0
+            for index, queued in enumerate(self.queue):
+                if queued is job:
+                    return index + 1
+            return 0
+
+    def estimated_wait(self, job):
+        """Seconds until the job is expected to finish"""
+        position = self.position(job)
+        with self.condition:
+            if job.status == RUNNING:
+                return max(0.0, job.started_at + self.service_seconds - time.time())
+            if job.status != QUEUED:
+                return 0.0
+            return self._wait_for_position(position)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "queued": len(self.queue),
+                "running": self.running,
+                "completed": sum(1 for job in self.jobs.values() if job.status == DONE),
+                "failed": sum(1 for job in self.jobs.values() if job.status == FAILED),
+                "service_seconds": self.service_seconds
+            }
+
+    def reset(self):
+        """Forget finished jobs and drop anything still queued"""
+        with self.condition:
+            for job in self.queue:
+                job.status = FAILED
+                job.error = "The challenge was restarted."
+            self.queue.clear()
+            self.jobs = {user_id: job for user_id, job in self.jobs.items() if job.status == RUNNING}
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                job = self.queue.popleft()
+                job.status = RUNNING
+                job.started_at = time.time()
+                self.running += 1
+
+            try:
+                self.process(job)
+                status, error = DONE, None
+            except Exception as e:
+                status, error = FAILED, str(e)
+
+            with self.condition:
+                job.finished_at = time.time()
+                job.status = status
+                job.error = error
+                self.running -= 1
+                duration = job.finished_at - job.started_at
+                self.service_seconds += self.smoothing * (duration - self.service_seconds)
@@ -0,0 +1,45 @@
+import hashlib, os, tempfile, zlib
+
+BLOBS_DIR = "./blobs"
+REF_PREFIX = "sha256:"
+
+def blob_path(ref, root=BLOBS_DIR):
+    """Location of a blob on disk, fanned out by the first two hex digits"""
+    digest = ref[len(REF_PREFIX):]
+    return os.path.join(root, digest[:2], digest[2:])
+
+def put_text(text, root=BLOBS_DIR):
+    """Store text compressed under its content hash and return the reference"""
+    data = (text or "").encode("utf-8")
+    ref = REF_PREFIX + hashlib.sha256(data).hexdigest()
+    path = blob_path(ref, root)
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A unique temp file per writer, so threads storing the same text never share one
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return ref
+
+def get_text(ref, root=BLOBS_DIR):
+    """Load and decompress the text behind a reference"""
+    with open(blob_path(ref, root), "rb") as f:
+        return zlib.decompress(f.read()).decode("utf-8")
+
+def resolve_text(record, field, root=BLOBS_DIR):
+    """Return a text field stored either inline or as a `<field>_ref` blob reference"""
+    ref = record.get(f"{field}_ref")
+    if ref:
+        try:
+            return get_text(ref, root)
+        except (OSError, zlib.error) as e:
+            print(f"Error loading blob {ref}: {e}")
+            return None
+    return record.get(field)
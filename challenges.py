@@ -0,0 +1,177 @@
+import json, os, re, yaml
+
+REQUIRED_FIELDS = {
+    "id": str,
+    "name": str,
+    "description": str,
+    "data": str,
+    "time_limit": int,
+    "scoring_criteria": str,
+    "criteria": dict,
+    "rubric": str,
+    "expected_output": (dict, list),
+}
+
+PACK_EXTENSIONS = (".yaml", ".yml", ".json")
+DEFAULT_EVALUATOR_ROLE = "You are an expert evaluator for advanced prompt engineering challenges."
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text):
+    """Rough token count: words and punctuation marks"""
+    if not text:
+        return 0
+    return len(TOKEN_PATTERN.findall(str(text)))
+
+def derive_schema(value):
+    """Derive a JSON schema describing the shape of a gold output"""
+    if isinstance(value, dict):
+        return {
+            "type": "object",
+            "properties": {key: derive_schema(item) for key, item in value.items()},
+            "required": list(value.keys())
+        }
+    if isinstance(value, list):
+        return {"type": "array", "items": derive_schema(value[0]) if value else {}}
+    if isinstance(value, bool):
+        return {"type": "boolean"}
+    if isinstance(value, (int, float)):
+        return {"type": "number"}
+    if value is None:
+        return {"type": "null"}
+    return {"type": "string"}
+
+def validate_pack(pack, source):
+    """Check a raw challenge pack and raise ValueError describing the first problem"""
+    if not isinstance(pack, dict):
+        raise ValueError(f"{source}: challenge pack must be a mapping")
+
+    for field, expected_type in REQUIRED_FIELDS.items():
+        if field not in pack:
+            raise ValueError(f"{source}: missing required field '{field}'")
+        if not isinstance(pack[field], expected_type) or isinstance(pack[field], bool):
+            raise ValueError(f"{source}: field '{field}' has the wrong type")
+
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", pack["id"]):
+        raise ValueError(f"{source}: id may only contain letters, digits, '-' and '_'")
+    if pack["time_limit"] <= 0:
+        raise ValueError(f"{source}: time_limit must be positive")
+    if not pack["criteria"] or not all(isinstance(points, (int, float)) and not isinstance(points, bool) for points in pack["criteria"].values()):
+        raise ValueError(f"{source}: criteria must map each criterion to its points")
+    if "evaluator_role" in pack and not isinstance(pack["evaluator_role"], str):
+        raise ValueError(f"{source}: evaluator_role must be a string")
+    if "output_example" in pack and not isinstance(pack["output_example"], (dict, list)):
+        raise ValueError(f"{source}: output_example must be a JSON object or array")
+
+def build_artifacts(pack):
+    """Precompute everything derived from a pack that the app needs on each submission"""
+    gold_output = json.dumps(pack["expected_output"], indent=2)
+    breakdown_format = ",\n".join(
+        f'                "{name}": <score_out_of_{points}>' for name, points in pack["criteria"].items()
+    )
+    rubric = "\n".join(f"        {line}" if line else "" for line in pack["rubric"].splitlines())
+
+    response_prefix = f"""
+        Data: {pack['data']}
+
+        """
+
+    evaluation_prefix = f"""
+        {pack.get('evaluator_role', DEFAULT_EVALUATOR_ROLE)}
+        Your task is to rigorously score a response on a scale of 0-100 based on how well it meets the requirements.
+
+        CHALLENGE INFORMATION:
+
+        Data provided:
+        ```
+        {pack['data']}
+        ```
+
+        EXPECTED OUTPUT (GOLD STANDARD):
+        ```
+        {gold_output}
+        ```
+
+
+        USER'S PROMPT:
+        ```
+        """
+
+    evaluation_middle = """
+        ```
+
+        MODEL'S RESPONSE TO THE PROMPT:
+        ```
+        """
+
+    evaluation_suffix = f"""
+        ```
+
+        Please analyze the response with extreme attention to detail and assign a score from 0-100 based on these criteria:
+{rubric}
+
+        Return ONLY a JSON object with this structure:
+        {{
+            "total_score": <numerical_score_between_0_and_100>,
+            "breakdown": {{
+{breakdown_format}
+            }},
+            "feedback": "<detailed explanation of the score with specific examples of errors or missing information, and suggestions for prompt improvement>"
+        }}
+        """
+
+    return {
+        "gold_output": gold_output,
+        "schema": derive_schema(pack["expected_output"]),
+        "response_prefix": response_prefix,
+        "evaluation_prefix": evaluation_prefix,
+        "evaluation_middle": evaluation_middle,
+        "evaluation_suffix": evaluation_suffix,
+        "token_counts": {
+            "data": estimate_tokens(pack["data"]),
+            "gold_output": estimate_tokens(gold_output),
+            "response_prefix": estimate_tokens(response_prefix),
+            "evaluation_overhead": estimate_tokens(evaluation_prefix + evaluation_middle + evaluation_suffix)
+        }
+    }
+
+def read_pack(path):
+    """Parse a single YAML or JSON challenge pack"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return yaml.safe_load(f)
+
+def load_registry(directory):
+    """Load, validate and precompile every challenge pack in a directory.
+
+    Returns a dict of challenges keyed by id and a list of errors for packs
+    that were skipped.
+    """
+    challenges, errors = {}, []
+    if not os.path.isdir(directory):
+        return challenges, [f"Challenge directory {directory} does not exist"]
+
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(PACK_EXTENSIONS):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            pack = read_pack(path)
+            validate_pack(pack, filename)
+            if pack["id"] in challenges:
+                raise ValueError(f"{filename}: duplicate challenge id '{pack['id']}'")
+            pack["artifacts"] = build_artifacts(pack)
+            challenges[pack["id"]] = pack
+        except Exception as e:
+            errors.append(str(e) if isinstance(e, ValueError) else f"{filename}: {e}")
+
+    return challenges, errors
+
+def default_evaluation(challenge, fraction, feedback):
+    """Fallback evaluation awarding the same fraction of every criterion"""
+    breakdown = {name: round(points * fraction) for name, points in challenge["criteria"].items()}
+    return {
+        "total_score": sum(breakdown.values()),
+        "breakdown": breakdown,
+        "feedback": feedback
+    }
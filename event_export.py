@@ -0,0 +1,187 @@
+import argparse, json, os, sys
+import pyarrow as pa, pyarrow.csv as pacsv, pyarrow.dataset as pads, pyarrow.parquet as pq
+from blob_store import BLOBS_DIR, resolve_text
+from challenges import estimate_tokens
+
+SUBMISSIONS_FILE = "submissions.json"
+STATE_FILE = "challenge_state.json"
+BATCH_SIZE = 500
+
+BASE_FIELDS = [
+    ("event_id", pa.string()),
+    ("challenge_id", pa.string()),
+    ("user_id", pa.string()),
+    ("name", pa.string()),
+    ("timestamp", pa.string()),
+    ("total_score", pa.float64()),
+    ("response_seconds", pa.float64()),
+    ("evaluation_seconds", pa.float64()),
+    ("prompt_tokens", pa.int64()),
+    ("response_tokens", pa.int64()),
+    ("prompt", pa.string()),
+    ("response", pa.string()),
+    ("feedback", pa.string()),
+]
+
+def load_event(event_dir):
+    """Read an event's submissions index and the challenge id from its state file"""
+    with open(os.path.join(event_dir, SUBMISSIONS_FILE), "r") as f:
+        submissions = json.load(f)
+
+    challenge_id = None
+    state_file = os.path.join(event_dir, STATE_FILE)
+    if os.path.exists(state_file):
+        with open(state_file, "r") as f:
+            try:
+                challenge_id = json.load(f).get("challenge_id")
+            except Exception:
+                pass
+    return submissions, challenge_id
+
+def breakdown_keys(submissions):
+    """Collect every breakdown criterion used across an event's submissions"""
+    keys = []
+    for sub in submissions.values():
+        breakdown = (sub.get("evaluation") or {}).get("breakdown") or {}
+        for key in breakdown:
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+def event_schema(criteria):
+    """Arrow schema for an event with the given breakdown criteria"""
+    return pa.schema(BASE_FIELDS + [(f"breakdown_{key}", pa.float64()) for key in criteria])
+
+def as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def iter_rows(submissions, event_id, criteria, challenge_id=None, blobs_dir=BLOBS_DIR):
+    """Yield one flat row per submission, fetching blob-stored texts as it goes"""
+    for user_id, sub in submissions.items():
+        evaluation = sub.get("evaluation") or {}
+        breakdown = evaluation.get("breakdown") or {}
+        prompt = resolve_text(sub, "prompt", blobs_dir)
+        response = resolve_text(sub, "response", blobs_dir)
+
+        row = {
+            "event_id": event_id,
+            "challenge_id": sub.get("challenge_id", challenge_id),
+            "user_id": user_id,
+            "name": sub.get("name"),
+            "timestamp": sub.get("timestamp"),
+            "total_score": as_float(evaluation.get("total_score")),
+            "response_seconds": as_float(sub.get("response_seconds")),
+            "evaluation_seconds": as_float(sub.get("evaluation_seconds")),
+            "prompt_tokens": sub.get("prompt_tokens", estimate_tokens(prompt)),
+            "response_tokens": sub.get("response_tokens", estimate_tokens(response)),
+            "prompt": prompt,
+            "response": response,
+            "feedback": resolve_text(evaluation, "feedback", blobs_dir),
+        }
+        for key in criteria:
+            row[f"breakdown_{key}"] = as_float(breakdown.get(key))
+        yield row
+
+def iter_batches(rows, schema, batch_size=BATCH_SIZE):
+    """Group rows into record batches so only one batch is held in memory"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield pa.RecordBatch.from_pylist(batch, schema=schema)
+            batch = []
+    if batch:
+        yield pa.RecordBatch.from_pylist(batch, schema=schema)
+
+def event_batches(submissions, event_id, challenge_id=None, blobs_dir=BLOBS_DIR, batch_size=BATCH_SIZE, criteria=None):
+    """Schema and record batches for one event, optionally with a fixed set of criteria"""
+    if criteria is None:
+        criteria = breakdown_keys(submissions)
+    schema = event_schema(criteria)
+    rows = iter_rows(submissions, event_id, criteria, challenge_id, blobs_dir)
+    return schema, iter_batches(rows, schema, batch_size)
+
+def write_parquet(submissions, sink, event_id, challenge_id=None, blobs_dir=BLOBS_DIR):
+    """Stream an event into a Parquet file path or writable buffer"""
+    schema, batches = event_batches(submissions, event_id, challenge_id, blobs_dir)
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+def write_csv(submissions, sink, event_id, challenge_id=None, blobs_dir=BLOBS_DIR):
+    """Stream an event into a CSV file path or writable buffer"""
+    schema, batches = event_batches(submissions, event_id, challenge_id, blobs_dir)
+    with pacsv.CSVWriter(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+def merge_events(event_dirs, out_dir, blobs_dir=BLOBS_DIR):
+    """Write many events into one Parquet dataset partitioned by event_id.
+
+    Every event is written with the same schema, whose breakdown columns
+    are the union of the criteria used across all events, so readers that
+    take the schema from any one fragment still see every column.
+    """
+    criteria = []
+    for event_dir in event_dirs:
+        submissions, _ = load_event(event_dir)
+        for key in breakdown_keys(submissions):
+            if key not in criteria:
+                criteria.append(key)
+
+    written = 0
+    for event_dir in event_dirs:
+        event_id = os.path.basename(os.path.normpath(event_dir))
+        submissions, challenge_id = load_event(event_dir)
+        if not submissions:
+            continue
+        schema, batches = event_batches(submissions, event_id, challenge_id, blobs_dir, criteria=criteria)
+        pads.write_dataset(
+            batches,
+            out_dir,
+            schema=schema,
+            format="parquet",
+            partitioning=pads.partitioning(pa.schema([("event_id", pa.string())]), flavor="hive"),
+            basename_template=f"{event_id}-{{i}}.parquet",
+            existing_data_behavior="delete_matching"
+        )
+        written += 1
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export Prompt Battle events for offline analysis")
+    parser.add_argument("--blobs-dir", default=BLOBS_DIR, help="Blob store holding prompt and response texts")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Export a single event directory")
+    export_cmd.add_argument("event_dir")
+    export_cmd.add_argument("--parquet", help="Parquet output path")
+    export_cmd.add_argument("--csv", help="CSV output path")
+    export_cmd.add_argument("--event-id", help="Defaults to the event directory name")
+
+    merge_cmd = commands.add_parser("merge", help="Merge event directories into a partitioned dataset")
+    merge_cmd.add_argument("out_dir")
+    merge_cmd.add_argument("event_dirs", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        if not args.parquet and not args.csv:
+            parser.error("export needs --parquet and/or --csv")
+        event_id = args.event_id or os.path.basename(os.path.normpath(args.event_dir))
+        submissions, challenge_id = load_event(args.event_dir)
+        if args.parquet:
+            write_parquet(submissions, args.parquet, event_id, challenge_id, args.blobs_dir)
+        if args.csv:
+            write_csv(submissions, args.csv, event_id, challenge_id, args.blobs_dir)
+        print(f"Exported {len(submissions)} submissions from {event_id}")
+    else:
+        written = merge_events(args.event_dirs, args.out_dir, args.blobs_dir)
+        print(f"Merged {written} events into {args.out_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import threading
+from array import array
+
+JOINED, SUBMITTED = 0, 1
+
+class ParticipantRegistry:
+    """Process-wide table of a room's participants.
+
+    Each participant gets a slot; status and score live in typed arrays and
+    the submission record is kept by reference, so "has this user submitted
+    and what did they score" is a dict lookup plus two array reads instead
+    of parsing the submissions file on every rerun. Every read and write
+    goes through the lock so a reset can never be observed half-applied.
+    """
+    __slots__ = ("lock", "slots", "user_ids", "status", "scores", "records")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.slots = {}
+            self.user_ids = []
+            self.status = array("b")
+            self.scores = array("d")
+            self.records = []
+
+    def _slot(self, user_id):
+        slot = self.slots.get(user_id)
+        if slot is None:
+            slot = len(self.user_ids)
+            self.slots[user_id] = slot
+            self.user_ids.append(user_id)
+            self.status.append(JOINED)
+            self.scores.append(0.0)
+            self.records.append(None)
+        return slot
+
+    def register(self, user_id):
+        """Give a user a slot if they have none and return their (status, score, submission record)"""
+        with self.lock:
+            slot = self._slot(user_id)
+            return self.status[slot], self.scores[slot], self.records[slot]
+
+    def record_submission(self, user_id, score, record):
+        with self.lock:
+            slot = self._slot(user_id)
+            self.status[slot] = SUBMITTED
+            self.scores[slot] = score
+            self.records[slot] = record
+
+    def has_submitted(self, user_id):
+        with self.lock:
+            slot = self.slots.get(user_id)
+            return slot is not None and self.status[slot] == SUBMITTED
+
+    def lookup(self, user_id):
+        """(status, score, submission record) for a user, or None if unknown"""
+        with self.lock:
+            slot = self.slots.get(user_id)
+            if slot is None:
+                return None
+            return self.status[slot], self.scores[slot], self.records[slot]
+
+    def counts(self):
+        """Users who joined this run (opened the challenge page) and how many of them submitted"""
+        with self.lock:
+            return {"joined": len(self.user_ids), "submitted": self.status.count(SUBMITTED)}
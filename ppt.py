@@ -1,62 +1,122 @@
-import streamlit as st, pandas as pd, json, time, re, hashlib, os, random, google.generativeai as genai
+import streamlit as st, pandas as pd, json, time, re, hashlib, os, io, math, random, shutil, threading, uuid, zlib, google.generativeai as genai
 from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
 
-STATE_FILE = "./challenge_state.json"
-LEADERBOARD_FILE = "./leaderboard.json"
-SUBMISSIONS_FILE = "./submissions.json"
+from challenges import load_registry, default_evaluation, estimate_tokens
+from event_export import write_parquet, write_csv
+from blob_store import put_text, get_text, resolve_text
+from rerun_profiler import RerunProfiler
+from score_store import ScoreColumns
+from admission import AdmissionController, QUEUED, RUNNING, FAILED
+from submission_index import SubmissionIndex
+from singleflight import SingleFlight, request_key
+from participants import ParticipantRegistry, SUBMITTED
 
-def save_state(challenge_active=False, challenge_end_time=None):
+CHALLENGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "challenges")
+ROOMS_DIR = "./rooms"
+EVENTS_DIR = "./events"
+DEFAULT_ROOM = "main"
+SUBMISSION_WORKERS = 4
+ADMISSION_GRACE_SECONDS = 60
+
+MODEL_NAME = "gemini-2.0-flash-lite"
+RESPONSE_CONFIG = {
+    "temperature": 0.1,
+    "top_p": 0.95,
+    "top_k": 40,
+    "candidate_count": 1,
+    "max_output_tokens": 4096
+}
+
+STATE_FILE = "challenge_state.json"
+LEADERBOARD_FILE = "leaderboard.json"
+SUBMISSIONS_FILE = "submissions.json"
+
+def room_file(room_id, filename):
+    """Path of a room's data file"""
+    return os.path.join(ROOMS_DIR, room_id, filename)
+
+def normalize_room_id(room_id):
+    """Return a safe room id, falling back to the default room"""
+    if room_id and re.fullmatch(r"[A-Za-z0-9_-]{1,32}", room_id):
+        return room_id
+    return DEFAULT_ROOM
+
+def list_rooms():
+    """List rooms that have data on disk"""
+    if not os.path.isdir(ROOMS_DIR):
+        return []
+    return sorted(name for name in os.listdir(ROOMS_DIR) if os.path.isdir(os.path.join(ROOMS_DIR, name)))
+
+def save_state(room_id, challenge_active=False, challenge_end_time=None, challenge_id=None, run_id=None):
     """Save the challenge state to a file"""
-    with open(STATE_FILE, "w") as f:
+    os.makedirs(os.path.join(ROOMS_DIR, room_id), exist_ok=True)
+    with open(room_file(room_id, STATE_FILE), "w") as f:
         json.dump({
             "challenge_active": challenge_active,
-            "challenge_end_time": challenge_end_time
+            "challenge_end_time": challenge_end_time,
+            "challenge_id": challenge_id,
+            "run_id": run_id
         }, f)
 
-def load_state():
+def load_state(room_id):
     """Load challenge state from file"""
-    if not os.path.exists(STATE_FILE):
-        return False, None
+    state_file = room_file(room_id, STATE_FILE)
+    if not os.path.exists(state_file):
+        return False, None, None
     
-    with open(STATE_FILE, "r") as f:
+    with open(state_file, "r") as f:
         try:
             data = json.load(f)
-            return data.get("challenge_active", False), data.get("challenge_end_time")
+            return data.get("challenge_active", False), data.get("challenge_end_time"), data.get("challenge_id")
+        except:
+            return False, None, None
+
+def load_run_id(room_id):
+    """Id of the room's current challenge run; only a new start changes it, ending keeps it"""
+    state_file = room_file(room_id, STATE_FILE)
+    if not os.path.exists(state_file):
+        return None
+    
+    with open(state_file, "r") as f:
+        try:
+            return json.load(f).get("run_id")
         except:
-            return False, None
+            return None
 
-def save_leaderboard(leaderboard_data):
+def save_leaderboard(room_id, leaderboard_data):
     """Save leaderboard to file"""
-    with open(LEADERBOARD_FILE, "w") as f:
+    os.makedirs(os.path.join(ROOMS_DIR, room_id), exist_ok=True)
+    with open(room_file(room_id, LEADERBOARD_FILE), "w") as f:
         json.dump(leaderboard_data, f)
 
-def load_leaderboard():
+def load_leaderboard(room_id):
     """Load leaderboard from file"""
-    if not os.path.exists(LEADERBOARD_FILE):
-        save_leaderboard([])
+    leaderboard_file = room_file(room_id, LEADERBOARD_FILE)
+    if not os.path.exists(leaderboard_file):
+        save_leaderboard(room_id, [])
         return []
     
-    with open(LEADERBOARD_FILE, "r") as f:
+    with open(leaderboard_file, "r") as f:
         try:
             data = json.load(f)
             if not isinstance(data, list):
                 data = []
-                save_leaderboard(data)
+                save_leaderboard(room_id, data)
             return data
         except Exception as e:
             print(f"Error loading leaderboard: {str(e)}")
-            save_leaderboard([])
+            save_leaderboard(room_id, [])
             return []
 
-def save_submissions(submissions_data):
+def save_submissions(room_id, submissions_data):
     """Save submissions to file"""
     try:
-        directory = os.path.dirname(SUBMISSIONS_FILE)
+        directory = os.path.join(ROOMS_DIR, room_id)
         if directory and not os.path.exists(directory):
             os.makedirs(directory, exist_ok=True)
             
-        with open(SUBMISSIONS_FILE, "w") as f:
+        with open(room_file(room_id, SUBMISSIONS_FILE), "w") as f:
             json.dump(submissions_data, f, default=str)  
             
         return True
@@ -64,24 +124,122 @@ def save_submissions(submissions_data):
         print(f"Error saving submissions: {e}")
         return False
 
-def load_submissions():
+def load_submissions(room_id):
     """Load submissions from file"""
-    if not os.path.exists(SUBMISSIONS_FILE):
-        save_submissions({})
+    submissions_file = room_file(room_id, SUBMISSIONS_FILE)
+    if not os.path.exists(submissions_file):
+        save_submissions(room_id, {})
         return {}
     
-    with open(SUBMISSIONS_FILE, "r") as f:
+    with open(submissions_file, "r") as f:
         try:
             data = json.load(f)
             if not isinstance(data, dict):
                 data = {}
-                save_submissions(data)
+                save_submissions(room_id, data)
             return data
         except Exception as e:
             print(f"Error loading submissions: {str(e)}")
-            save_submissions({})
+            save_submissions(room_id, {})
             return {}
 
+@st.cache_resource
+def get_challenge_registry():
+    """Load and precompile the challenge packs once per process"""
+    return load_registry(CHALLENGES_DIR)
+
+def get_challenge(challenge_id):
+    """Look up a challenge by id in the cached registry"""
+    challenges, _ = get_challenge_registry()
+    return challenges.get(challenge_id)
+
+@st.cache_resource
+def get_rerun_profiler():
+    """Profiler shared by every session so reruns are aggregated across users"""
+    return RerunProfiler()
+
+@st.cache_resource
+def get_score_store(room_id):
+    """Score columns for a room, built from disk once and then updated on each submission"""
+    _, challenge_end_time, challenge_id = load_state(room_id)
+    challenge = get_challenge(challenge_id)
+    criteria = list(challenge["criteria"]) if challenge else []
+    started_at = challenge_end_time - challenge["time_limit"] if challenge and challenge_end_time else None
+    
+    store = ScoreColumns(criteria, started_at)
+    for sub in load_submissions(room_id).values():
+        evaluation = sub.get("evaluation") or {}
+        try:
+            submitted_at = datetime.fromisoformat(sub["timestamp"]).timestamp()
+            store.append(float(evaluation["total_score"]), submitted_at, evaluation.get("breakdown"))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Skipping submission in score store: {str(e)}")
+    return store
+
+@st.cache_resource
+def get_submission_index(room_id):
+    """Searchable index of a room's submissions, built from disk once and then kept current"""
+    index = SubmissionIndex()
+    for user_id, sub in load_submissions(room_id).items():
+        try:
+            score = float((sub.get("evaluation") or {}).get("total_score"))
+        except (TypeError, ValueError):
+            score = 0.0
+        index.add(user_id, sub, resolve_text(sub, "prompt"), score)
+    return index
+
+@st.cache_resource
+def get_single_flight():
+    """Shared across sessions so identical in-flight API requests are made once"""
+    return SingleFlight()
+
+@st.cache_resource
+def get_participant_registry(room_id):
+    """Participants of a room with their status, score and submission, built from disk once"""
+    registry = ParticipantRegistry()
+    for user_id, sub in load_submissions(room_id).items():
+        try:
+            score = float((sub.get("evaluation") or {}).get("total_score"))
+        except (TypeError, ValueError):
+            score = 0.0
+        registry.record_submission(user_id, score, sub)
+    return registry
+
+@st.cache_resource
+def get_room_lock(room_id):
+    """Serializes writes to a room's submissions and leaderboard files"""
+    return threading.Lock()
+
+@st.cache_resource
+def get_admission_controller(room_id):
+    """Submission queue for a room, shared by every session in it"""
+    return AdmissionController(
+        lambda job: process_submission(room_id, job),
+        workers=SUBMISSION_WORKERS,
+        grace_seconds=ADMISSION_GRACE_SECONDS
+    )
+
+@st.cache_data(max_entries=256)
+def load_blob(ref):
+    """Fetch a blob's text; blobs are immutable so results are cached by reference"""
+    return get_text(ref)
+
+def stored_text(record, field):
+    """Text of a submission field, whether it is inline or a blob reference"""
+    ref = record.get(f"{field}_ref")
+    if ref:
+        try:
+            return load_blob(ref)
+        except (OSError, zlib.error) as e:
+            print(f"Error loading blob {ref}: {str(e)}")
+            return "(text unavailable)"
+    return record.get(field)
+
+def lazy_text_section(label, record, field, key, render=st.write):
+    """Show a toggle that only fetches the stored text once it is switched on"""
+    if st.toggle(label, key=key):
+        render(stored_text(record, field))
+
 st.set_page_config(
     page_title="Prompt Battle Arena",
     page_icon="🥊",
@@ -178,226 +336,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-data_extraction_challenge = {
-    "name": "Advanced Multi-Format Data Extraction Challenge",
-    "description": "Extract the following information from this complex invoice with inconsistent formatting as structured JSON: invoice number, date, total amount due, customer details (including all contact information), shipping information, all line items with their quantities, unit prices, SKU codes, and discounts. Calculate the accurate pre-tax subtotal and tax amount based on the line items.",
-    "data": """
-INVOICE #INV-20240328-9C45X
-Issued: 03/28/2024    Due: Net-15    Terms: 2% \discount if paid within 7 days
-
-BILLED TO:                         |  SHIP TO:
-GlobalTech Solutions Inc.          |  GlobalTech Solutions - West Campus
-Attn: Sarah Williams, Procurement  |  4588 Innovation Park, Building C
-1250 Enterprise Boulevard          |  San Jose, CA 95132
-Suite 300, Tower B                 |  Recipient: James Chen
-Chicago, IL 60611                  |  Badge #: GT-2245
-Tax ID: 81-3945027                 |  Contact: (408) 555-9087
-sarah.w@globaltechsolutions.com    |  Delivery Instructions: Leave with security
-
-ORDER REFERENCE: PO-GT-2024-0587
-Sales Rep: Michael Johnson (ID: MJ394)
-Customer Account: GLOB-ENT-7721
-
-===================================================================================================
-ITEM DESCRIPTION                           | SKU       | QTY |   UNIT PRICE  |  DISCOUNT  |  TOTAL
-===================================================================================================
-Enterprise Server Rack - 42U               | SVR-42U   |  2  |  $1,299.95    |    15%     | $2,209.92
----------------------------------------------------------------------------------------------------
-High Performance SSD Storage Array         | SSD-HPE   |  3  |    $879.50    |     0%     | $2,638.50
----------------------------------------------------------------------------------------------------
-Network Security Appliance - Advanced      | NSA-ADV   |  1  |  $3,295.00    |    7.5%    | $3,047.88
-(Includes 12-month subscription)
----------------------------------------------------------------------------------------------------
-Cat-7 Ethernet Cable Bundle (25 pcs)       | CAB-C7-25 |  4  |    $189.75    |    10%     |   $683.10
----------------------------------------------------------------------------------------------------
-System Administration Software License     | SAS-ENT   |  2  |  $1,450.00    |     5%     | $2,755.00
-(Enterprise Edition - 3 year)
----------------------------------------------------------------------------------------------------
-Rack Mounting Kit - Universal              | RMK-UNV   |  8  |     $45.99    |     0%     |   $367.92
-===================================================================================================
-
-                                                                  Merchandise Subtotal: $11,702.32
-                                                               Volume Discount (3.5%): -$409.58
-                                                                   Adjusted Subtotal: $11,292.74
-                                                                Shipping & Handling: $275.00
-                                                                          Insurance: $150.00
-                                                                     Processing Fee: $35.00
-                                                                          Pre-tax Total: $11,752.74
-                                                                  Sales Tax (8.25%): $969.60
-                                                                     =====================
-                                                                      ** TOTAL DUE: $12,722.34 **
-
-PAYMENT METHODS:
-- Bank Transfer: Account #7382910, Routing #021000089, First National Bank
-- Credit Card: Please call (312) 555-3980 for secure processing
-- Check: Payable to "TechSupply Distributors Inc."
-
-NOTES:
-1. All prices are in USD
-2. Warranty information available at www.techsupply.com/warranty
-3. Return policy: 30-day money-back guarantee for unopened items
-4. Damaged items must be reported within 48 hours of delivery
-
-TechSupply Distributors Inc.
-2500 Commerce Parkway, Suite 400
-Boston, MA 02110
-Customer Service: (800) 555-8721
-www.techsupply.com
-""",
-    "time_limit": 3 * 60,  
-    "scoring_criteria": "Accuracy of extraction (completeness and correctness of all fields including nested structures), calculation accuracy, and correct handling of discounts and tax calculations. All numbers must match exactly with formatting preserved.",
-    "expected_output": {
-        "invoice_number": "INV-20240328-9C45X",
-        "date": {
-            "issued": "03/28/2024",
-            "due": "Net-15",
-            "payment_terms": "2% discount if paid within 7 days"
-        },
-        "customer": {
-            "name": "GlobalTech Solutions Inc.",
-            "attention": "Sarah Williams, Procurement",
-            "address": {
-                "street": "1250 Enterprise Boulevard",
-                "suite": "Suite 300, Tower B",
-                "city": "Chicago",
-                "state": "IL",
-                "zip": "60611"
-            },
-            "tax_id": "81-3945027",
-            "email": "sarah.w@globaltechsolutions.com",
-            "account": "GLOB-ENT-7721"
-        },
-        "shipping": {
-            "name": "GlobalTech Solutions - West Campus",
-            "address": {
-                "street": "4588 Innovation Park, Building C",
-                "city": "San Jose",
-                "state": "CA",
-                "zip": "95132"
-            },
-            "recipient": "James Chen",
-            "badge": "GT-2245",
-            "contact": "(408) 555-9087",
-            "instructions": "Leave with security"
-        },
-        "order_reference": "PO-GT-2024-0587",
-        "sales_rep": {
-            "name": "Michael Johnson",
-            "id": "MJ394"
-        },
-        "line_items": [
-            {
-                "description": "Enterprise Server Rack - 42U",
-                "sku": "SVR-42U",
-                "quantity": 2,
-                "unit_price": "$1,299.95",
-                "discount_percentage": 15,
-                "total": "$2,209.92"
-            },
-            {
-                "description": "High Performance SSD Storage Array",
-                "sku": "SSD-HPE",
-                "quantity": 3,
-                "unit_price": "$879.50",
-                "discount_percentage": 0,
-                "total": "$2,638.50"
-            },
-            {
-                "description": "Network Security Appliance - Advanced",
-                "sku": "NSA-ADV",
-                "quantity": 1,
-                "unit_price": "$3,295.00",
-                "discount_percentage": 7.5,
-                "total": "$3,047.88",
-                "notes": "Includes 12-month subscription"
-            },
-            {
-                "description": "Cat-7 Ethernet Cable Bundle (25 pcs)",
-                "sku": "CAB-C7-25",
-                "quantity": 4,
-                "unit_price": "$189.75",
-                "discount_percentage": 10,
-                "total": "$683.10"
-            },
-            {
-                "description": "System Administration Software License",
-                "sku": "SAS-ENT",
-                "quantity": 2,
-                "unit_price": "$1,450.00",
-                "discount_percentage": 5,
-                "total": "$2,755.00",
-                "notes": "Enterprise Edition - 3 year"
-            },
-            {
-                "description": "Rack Mounting Kit - Universal",
-                "sku": "RMK-UNV",
-                "quantity": 8,
-                "unit_price": "$45.99",
-                "discount_percentage": 0,
-                "total": "$367.92"
-            }
-        ],
-        "totals": {
-            "merchandise_subtotal": "$11,702.32",
-            "volume_discount": {
-                "percentage": 3.5,
-                "amount": "-$409.58"
-            },
-            "adjusted_subtotal": "$11,292.74",
-            "shipping_and_handling": "$275.00",
-            "insurance": "$150.00",
-            "processing_fee": "$35.00",
-            "pre_tax_total": "$11,752.74",
-            "sales_tax": {
-                "percentage": 8.25,
-                "amount": "$969.60"
-            },
-            "total_due": "$12,722.34"
-        },
-        "payment_methods": [
-            {
-                "method": "Bank Transfer",
-                "details": {
-                    "account": "7382910",
-                    "routing": "021000089",
-                    "bank": "First National Bank"
-                }
-            },
-            {
-                "method": "Credit Card",
-                "details": {
-                    "phone": "(312) 555-3980",
-                    "note": "for secure processing"
-                }
-            },
-            {
-                "method": "Check",
-                "details": {
-                    "payable_to": "TechSupply Distributors Inc."
-                }
-            }
-        ],
-        "notes": [
-            "All prices are in USD",
-            "Warranty information available at www.techsupply.com/warranty",
-            "Return policy: 30-day money-back guarantee for unopened items",
-            "Damaged items must be reported within 48 hours of delivery"
-        ],
-        "vendor": {
-            "name": "TechSupply Distributors Inc.",
-            "address": {
-                "street": "2500 Commerce Parkway",
-                "suite": "Suite 400",
-                "city": "Boston",
-                "state": "MA",
-                "zip": "02110"
-            },
-            "customer_service": "(800) 555-8721",
-            "website": "www.techsupply.com"
-        }
-    }
-}
-
 def setup_gemini_api(user_id=None):
     """Set up Gemini API with rotating API keys based on user ID"""
     if 'GEMINI_API_KEYS' in st.secrets:
@@ -423,30 +361,23 @@ def setup_gemini_api(user_id=None):
             st.error("Gemini API keys not configured. This is a demo version.")
             return False
 
-def call_gemini(prompt, challenge_data, user_id=None):
+def call_gemini(prompt, challenge, user_id=None):
     try:
         api_configured = setup_gemini_api(user_id)
         
-        full_prompt = f"""
-        Data: {challenge_data['data']}
-        
-        {prompt}
+        full_prompt = f"""{challenge['artifacts']['response_prefix']}{prompt}
         """
         
         if api_configured:
             try:
-                model = genai.GenerativeModel('gemini-2.0-flash-lite')
-                response = model.generate_content(
-                    full_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.1,
-                        top_p=0.95,
-                        top_k=40,
-                        candidate_count=1,
-                        max_output_tokens=4096
-                    )
+                model = genai.GenerativeModel(MODEL_NAME)
+                return get_single_flight().do(
+                    request_key(MODEL_NAME, RESPONSE_CONFIG, full_prompt),
+                    lambda: model.generate_content(
+                        full_prompt,
+                        generation_config=genai.types.GenerationConfig(**RESPONSE_CONFIG)
+                    ).text
                 )
-                return response.text
             except Exception as e:
                 st.warning(f"API error: {e}. Using demo response.")
                 return f"API error: {e}. Using demo response."
@@ -460,82 +391,22 @@ def evaluate_with_gemini(response, prompt, challenge, user_id=None):
     try:
         api_configured = setup_gemini_api(user_id)
         
-        evaluation_prompt = f"""
-        You are an expert evaluator for advanced prompt engineering challenges specializing in data extraction. 
-        Your task is to rigorously score a response on a scale of 0-100 based on how well it meets the requirements.
-        
-        CHALLENGE INFORMATION:
-
-        Data provided:
-        ```
-        {challenge['data']}
-        ```
-        
-        EXPECTED OUTPUT (GOLD STANDARD):
-        ```
-        {json.dumps(challenge['expected_output'], indent=2)}
-        ```
-
-
-        USER'S PROMPT:
-        ```
-        {prompt}
-        ```
-        
-        MODEL'S RESPONSE TO THE PROMPT:
-        ```
-        {response}
-        ```
-        
-        Please analyze the response with extreme attention to detail and assign a score from 0-100 based on these criteria:
-        1. Completeness (20 points):
-           - All required fields extracted (10 points)
-           - Proper handling of nested structures (5 points)
-           - No missing details from complex fields (5 points)
-           
-        2. Accuracy (40 points):
-           - Correct extraction of all values (15 points)
-           - Exact matching of numerical values with proper formatting (10 points)
-           - Correct calculation of discounts and totals (10 points)
-           - Proper handling of special formatting and notes (5 points)
-           
-        3. Structure (20 points):
-           - JSON structure matches expected hierarchy (10 points)
-           - Proper data types used throughout (5 points)
-           - Consistent formatting and organization (5 points)
-           
-        4. Prompt Quality (20 points):
-           - Clear instructions for handling complex formatting (5 points)
-           - Specific guidance on nested structures (5 points)
-           - Instructions for calculations and validation (5 points)
-           - Effective strategies for ensuring data integrity (5 points)
-        
-        Deduct points severely for:
-        - Missing or incorrect nested fields
-        - Calculation errors in totals, discounts, or taxes
-        - Improper handling of special characters and formatting
-        - Structural errors in the JSON output
-        - Missing notes or product details
-        
-        Return ONLY a JSON object with this structure:
-        {{
-            "total_score": <numerical_score_between_0_and_100>,
-            "breakdown": {{
-                "completeness": <score_out_of_20>,
-                "accuracy": <score_out_of_40>,
-                "structure": <score_out_of_20>,
-                "prompt_quality": <score_out_of_20>
-            }},
-            "feedback": "<detailed explanation of the score with specific examples of errors or missing information, and suggestions for prompt improvement>"
-        }}
-        """
+        artifacts = challenge['artifacts']
+        evaluation_prompt = (
+            artifacts['evaluation_prefix'] + prompt +
+            artifacts['evaluation_middle'] + str(response) +
+            artifacts['evaluation_suffix']
+        )
         
         if api_configured:
             try:
-                model = genai.GenerativeModel('gemini-2.0-flash-lite')
-                evaluation_response = model.generate_content(evaluation_prompt)
+                model = genai.GenerativeModel(MODEL_NAME)
+                evaluation_text = get_single_flight().do(
+                    request_key(MODEL_NAME, None, evaluation_prompt),
+                    lambda: model.generate_content(evaluation_prompt).text
+                )
                 
-                json_match = re.search(r'\{.*\}', evaluation_response.text, re.DOTALL)
+                json_match = re.search(r'\{.*\}', evaluation_text, re.DOTALL)
                 if json_match:
                     result = json.loads(json_match.group(0))
                     return result
@@ -546,19 +417,10 @@ def evaluate_with_gemini(response, prompt, challenge, user_id=None):
     except Exception as e:
         print(f"Evaluation error: {str(e)}")
         st.warning(f"Evaluation failed: {e}. Assigning default score.")
-        return {
-            "total_score": 65,
-            "breakdown": {
-                "completeness": 13,
-                "accuracy": 26,
-                "structure": 13,
-                "prompt_quality": 13
-            },
-            "feedback": f"Evaluation error occurred. Default score assigned."
-        }
+        return default_evaluation(challenge, 0.65, "Evaluation error occurred. Default score assigned.")
  
-def display_timer():
-    challenge_active, challenge_end_time = load_state()
+def display_timer(room_id):
+    challenge_active, challenge_end_time, _ = load_state(room_id)
     
     if challenge_active and challenge_end_time:
         remaining = challenge_end_time - time.time()
@@ -569,135 +431,346 @@ def display_timer():
         else:
             st.markdown("<div class='timer'>⏰ Time's Up!</div>", unsafe_allow_html=True)
             
-def start_challenge():
-    end_time = time.time() + data_extraction_challenge["time_limit"]
-    save_state(True, end_time)
-    save_submissions({}) 
-    save_leaderboard([]) 
+def archive_event(room_id):
+    """Copy a room's previous event into the events directory before it is reset"""
+    if not load_submissions(room_id):
+        return None
     
-def end_challenge():
-    save_state(False, None)
+    event_dir = os.path.join(EVENTS_DIR, f"{room_id}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    os.makedirs(event_dir, exist_ok=True)
+    for filename in (STATE_FILE, LEADERBOARD_FILE, SUBMISSIONS_FILE):
+        if os.path.exists(room_file(room_id, filename)):
+            shutil.copy(room_file(room_id, filename), event_dir)
+    return event_dir
 
-def submit_prompt(user_id, user_name, user_prompt):
-    challenge_active, challenge_end_time = load_state()
+def start_challenge(room_id, challenge):
+    with get_room_lock(room_id):
+        archive_event(room_id)
+        end_time = time.time() + challenge["time_limit"]
+        save_state(room_id, True, end_time, challenge["id"], uuid.uuid4().hex)
+        save_submissions(room_id, {}) 
+        save_leaderboard(room_id, []) 
+        get_score_store(room_id).reset(challenge["criteria"], time.time())
+        get_admission_controller(room_id).reset()
+        get_submission_index(room_id).reset()
+        get_participant_registry(room_id).reset()
     
-    if not user_name:
-        st.error("Please enter your name before submitting")
-        return False
-        
-    if challenge_end_time and time.time() > challenge_end_time:
-        st.error("Time's up! You can't submit now.")
-        return False
-        
-    submissions = load_submissions()
+def end_challenge(room_id):
+    with get_room_lock(room_id):
+        _, _, challenge_id = load_state(room_id)
+        save_state(room_id, False, None, challenge_id, load_run_id(room_id))
+
+def check_run(room_id, job):
+    """Drop a job whose challenge run was replaced by a restart"""
+    if load_run_id(room_id) != job.payload["run_id"]:
+        raise RuntimeError("The challenge was restarted before your submission was evaluated.")
+
+def process_submission(room_id, job):
+    """Run the model and evaluator for an admitted submission and record the result"""
+    payload = job.payload
+    challenge = get_challenge(payload["challenge_id"])
+    user_id, user_name, user_prompt = job.user_id, payload["user_name"], payload["user_prompt"]
+    check_run(room_id, job)
+    
+    response_started = time.time()
+    response = call_gemini(user_prompt, challenge, user_id)
+    response_seconds = time.time() - response_started
+    
+    evaluation_started = time.time()
+    evaluation = evaluate_with_gemini(response, user_prompt, challenge, user_id)
+    evaluation_seconds = time.time() - evaluation_started
+    
+    if not isinstance(evaluation, dict) or "total_score" not in evaluation:
+        evaluation = default_evaluation(challenge, 0.5, "Evaluation format error. Default score assigned.")
+    
+    evaluation = dict(evaluation)
+    evaluation["feedback_ref"] = put_text(str(evaluation.pop("feedback", "")))
+    
+    submission_data = {
+        "name": user_name,
+        "challenge_id": challenge["id"],
+        "prompt_ref": put_text(user_prompt),
+        "response_ref": put_text(str(response)),
+        "evaluation": evaluation,
+        "timestamp": datetime.fromtimestamp(job.accepted_at).isoformat(),
+        "completed_at": datetime.now().isoformat(),
+        "response_seconds": round(response_seconds, 3),
+        "evaluation_seconds": round(evaluation_seconds, 3),
+        "prompt_tokens": estimate_tokens(user_prompt),
+        "response_tokens": estimate_tokens(response)
+    }
     
-    if user_id in submissions:
-        st.warning("You've already submitted a prompt for this challenge!")
-        return False
-        
-        
     try:
-        with st.spinner('Your prompt is being processed...'):
-            response = call_gemini(user_prompt, data_extraction_challenge, user_id)
-            
-        with st.spinner('Evaluating response quality...'):
-            evaluation = evaluate_with_gemini(response, user_prompt, data_extraction_challenge, user_id)
-        
-        if not isinstance(evaluation, dict) or "total_score" not in evaluation:
-            evaluation = {
-                "total_score": 50,
-                "breakdown": {
-                    "completeness": 10,
-                    "accuracy": 20,
-                    "structure": 10,
-                    "prompt_quality": 10
-                },
-                "feedback": "Evaluation format error. Default score assigned."
-            }
-        
-        submission_data = {
-            "name": user_name,
-            "prompt": user_prompt,
-            "response": response,
-            "evaluation": evaluation,
-            "timestamp": datetime.now().isoformat()
-        }
+        score = float(evaluation["total_score"])
+    except (TypeError, ValueError) as e:
+        print(f"Non-numeric score recorded as 0: {str(e)}")
+        score = 0.0
+    
+    with get_room_lock(room_id):
+        check_run(room_id, job)
         
+        submissions = load_submissions(room_id)
         submissions[user_id] = submission_data
-        save_success = save_submissions(submissions)
-        
-        
-        if not save_success:
-            st.error("Failed to save your submission. Please try again.")
-            return False
+        if not save_submissions(room_id, submissions):
+            raise RuntimeError("Failed to save your submission. Please try again.")
         
-        leaderboard = load_leaderboard()
+        leaderboard = load_leaderboard(room_id)
         
         new_entry = {
             'user_id': user_id,
             'name': user_name,
             'score': evaluation["total_score"],
-            'timestamp': datetime.now().isoformat()
+            'timestamp': submission_data["timestamp"]
         }
         
         leaderboard.append(new_entry)
-        save_leaderboard(leaderboard)
+        save_leaderboard(room_id, leaderboard)
         
-        print(f"Submission saved for {user_name} with score {evaluation['total_score']}")
-        print(f"Updated leaderboard: {leaderboard}")
+        get_participant_registry(room_id).record_submission(user_id, score, submission_data)
+        get_score_store(room_id).append(score, job.accepted_at, evaluation.get("breakdown"))
+        get_submission_index(room_id).add(user_id, submission_data, user_prompt, score)
+    
+    print(f"Submission saved for {user_name} with score {evaluation['total_score']}")
+
+def submit_from_form(room_id, challenge, user_id):
+    """Submit button callback: runs before the rerun's script body, so admission sees the actual click time"""
+    st.session_state.submit_error = submit_prompt(room_id, challenge, user_id,
+                                                  st.session_state.get("submit_name", ""),
+                                                  st.session_state.get("submit_prompt", ""),
+                                                  time.time())
+
+def submit_prompt(room_id, challenge, user_id, user_name, user_prompt, clicked_at):
+    """Hand a prompt to the admission queue; returns why it was refused, or None once admitted"""
+    challenge_active, challenge_end_time, _ = load_state(room_id)
+    
+    if not user_name:
+        return "Please enter your name before submitting"
         
-        st.success(f"Prompt submitted! Your score: {evaluation['total_score']}/100")
-        return True
-    except Exception as e:
-        st.error(f"Error processing submission: {str(e)}")
-        return False
+    if get_participant_registry(room_id).has_submitted(user_id):
+        return "You've already submitted a prompt for this challenge!"
+    
+    _, refusal = get_admission_controller(room_id).submit(
+        user_id,
+        {
+            "challenge_id": challenge["id"],
+            "run_id": load_run_id(room_id),
+            "user_name": user_name,
+            "user_prompt": user_prompt
+        },
+        deadline=challenge_end_time,
+        accepted_at=clicked_at
+    )
+    
+    return refusal
 
-def show_admin_page():
+def show_profiler_panel():
+    profiler = get_rerun_profiler()
+    
+    enabled = st.toggle("Profile every rerun (all sessions)", value=profiler.enabled, key="profiler_enabled")
+    if enabled != profiler.enabled:
+        profiler.enabled = enabled
+        if enabled:
+            profiler.clear()
+    
+    summary = profiler.summary()
+    if not summary:
+        st.write("No reruns recorded yet." if profiler.enabled else "Profiling is off.")
+        return
+    
+    st.dataframe(pd.DataFrame(summary).round(1), hide_index=True, use_container_width=True)
+    
+    session_type = st.radio("Session type", [row["session_type"] for row in summary], horizontal=True,
+                            key="profiler_session_type")
+    top = profiler.top_functions(session_type)
+    if top:
+        st.write("**Top functions by own time:**")
+        st.dataframe(pd.DataFrame(top).round(2), hide_index=True, use_container_width=True)
+        st.write("**Call tree (cumulative time):**")
+        st.code("\n".join(profiler.flame_lines(session_type)), language="text")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Dump pstats files", key="profiler_dump"):
+            for path in profiler.dump():
+                st.write(f"Saved `{path}`")
+    with col2:
+        if st.button("Clear profiles", key="profiler_clear"):
+            profiler.clear()
+            st.rerun()
+
+def clear_browser_selection():
+    st.session_state.pop("browser_selected", None)
+
+def show_submissions_browser(room_id):
+    index = get_submission_index(room_id)
+    
+    col1, col2, col3 = st.columns([2, 3, 2])
+    with col1:
+        name_filter = st.text_input("Name contains", key="browser_name")
+    with col2:
+        prompt_filter = st.text_input("Prompt contains", key="browser_prompt")
+    with col3:
+        min_score, max_score = st.slider("Score range", 0, 100, (0, 100), key="browser_scores")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Rows per page", [10, 25, 50, 100], index=1, key="browser_page_size")
+    with col2:
+        page = st.number_input("Page", min_value=1, value=1, step=1, key="browser_page")
+    
+    total, rows = index.query(name_filter, prompt_filter, min_score, max_score, page, page_size)
+    pages = max(1, math.ceil(total / page_size))
+    st.caption(f"{total} matching submissions of {len(index)} · page {min(page, pages)} of {pages}")
+    
+    def remember_selection():
+        # Keep the picked submission by user id: the table widget, and its selection, is
+        # rebuilt whenever the visible rows change, e.g. on a new submission or autorefresh
+        picked = st.session_state.browser_table.selection.rows
+        if picked and picked[0] < len(rows):
+            st.session_state.browser_selected = rows[picked[0]]["user_id"]
+    
+    if rows:
+        st.dataframe(
+            pd.DataFrame(rows)[["name", "score", "timestamp", "prompt_preview"]].rename(columns={
+                'name': 'Name',
+                'score': 'Score',
+                'timestamp': 'Timestamp',
+                'prompt_preview': 'Prompt'
+            }),
+            hide_index=True,
+            use_container_width=True,
+            on_select=remember_selection,
+            selection_mode="single-row",
+            key="browser_table"
+        )
+    else:
+        st.write("No submissions match these filters.")
+    
+    user_id = st.session_state.get("browser_selected")
+    sub = index.get(user_id) if user_id else None
+    if sub is None:
+        st.caption("Select a row to load its prompt, response and evaluation.")
+        return
+    
+    evaluation = dict(sub.get("evaluation") or {})
+    evaluation.pop("feedback_ref", None)
+    evaluation["feedback"] = stored_text(sub.get("evaluation") or {}, "feedback")
+    
+    st.markdown(f"**{sub.get('name')}** · `{user_id}`")
+    st.write("**Prompt:**")
+    st.write(stored_text(sub, "prompt"))
+    st.write("**Response:**")
+    st.code(stored_text(sub, "response"), language="json")
+    st.write("**Evaluation:**")
+    st.json(evaluation)
+    st.button("Close submission", on_click=clear_browser_selection, key="browser_close")
+
+def show_admin_page(room_id):
     st_autorefresh(interval=5000, key="admin-autorefresh")
     st.markdown("<h1 class='header'>🥊 Prompt Battle Arena - Admin Panel</h1>", unsafe_allow_html=True)
     
-    challenge_active, challenge_end_time = load_state()
+    challenge_active, challenge_end_time, challenge_id = load_state(room_id)
+    challenges, registry_errors = get_challenge_registry()
+    
+    for error in registry_errors:
+        st.warning(f"Skipped challenge pack: {error}")
     
     st.markdown("<div class='admin-panel'>", unsafe_allow_html=True)
+    st.markdown(f"**Room:** `{room_id}`")
     
     status_class = "status-active" if challenge_active else "status-inactive"
     status_text = "CHALLENGE ACTIVE" if challenge_active else "CHALLENGE INACTIVE"
     st.markdown(f"<div class='challenge-status {status_class}'>{status_text}</div>", unsafe_allow_html=True)
     
     if challenge_active:
-        display_timer()
+        display_timer(room_id)
+    
+    if not challenges:
+        st.error("No valid challenge packs found. Add a YAML or JSON pack to the challenges directory.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+    
+    challenge_ids = list(challenges)
+    selected_id = st.selectbox(
+        "Challenge",
+        challenge_ids,
+        index=challenge_ids.index(challenge_id) if challenge_id in challenges else 0,
+        format_func=lambda cid: challenges[cid]["name"],
+        disabled=challenge_active
+    )
+    challenge = challenges[challenge_id] if challenge_active and challenge_id in challenges else challenges[selected_id]
     
     col1, col2 = st.columns(2)
     with col1:
         start_btn = st.button("Start Challenge", key="start", disabled=challenge_active)
         if start_btn:
-            start_challenge()
+            start_challenge(room_id, challenge)
             st.success("Challenge has started!")
             st.rerun()
     with col2:
         end_btn = st.button("End Challenge", key="end", disabled=not challenge_active)
         if end_btn:
-            end_challenge()
+            end_challenge(room_id)
             st.rerun()
+    
+    participant_counts = get_participant_registry(room_id).counts()
+    st.caption(f"Participants: {participant_counts['joined']} joined, {participant_counts['submitted']} submitted")
+    queue_stats = get_admission_controller(room_id).stats()
+    flight_stats = get_single_flight().stats()
+    st.caption(
+        f"Submission queue: {queue_stats['queued']} waiting, {queue_stats['running']} processing, "
+        f"{queue_stats['failed']} failed, ~{queue_stats['service_seconds']:.1f}s per submission · "
+        f"API calls: {flight_stats['executed']} made, {flight_stats['collapsed']} collapsed into in-flight duplicates"
+    )
             
     st.markdown("</div>", unsafe_allow_html=True)
     
     with st.container():
-        st.markdown(f"**Scoring Criteria:**  \n{data_extraction_challenge['scoring_criteria']}")
+        st.markdown(f"**Scoring Criteria:**  \n{challenge['scoring_criteria']}")
+        token_counts = challenge["artifacts"]["token_counts"]
+        st.caption(
+            f"Approx. tokens: data {token_counts['data']}, gold output {token_counts['gold_output']}, "
+            f"evaluation overhead {token_counts['evaluation_overhead']}"
+        )
         st.markdown("</div>", unsafe_allow_html=True)
     
-    with st.expander("Debug Info (Submissions & Leaderboard)"):
-        st.write("Current Submissions:")
-        st.json(load_submissions())
-        st.write("Current Leaderboard:")
-        st.json(load_leaderboard())
+    with st.expander("Export Submissions"):
+        st.write("Download this room's submissions with flattened scores, timings and token counts.")
+        export_key = (room_id, challenge_id, load_run_id(room_id))
+        if st.session_state.get("export_files", {}).get("key") != export_key:
+            st.session_state.pop("export_files", None)
+        
+        if st.button("Prepare Export", key="prepare_export"):
+            submissions = load_submissions(room_id)
+            parquet_buffer, csv_buffer = io.BytesIO(), io.BytesIO()
+            write_parquet(submissions, parquet_buffer, room_id, challenge_id)
+            write_csv(submissions, csv_buffer, room_id, challenge_id)
+            st.session_state.export_files = {
+                "key": export_key,
+                "files": (parquet_buffer.getvalue(), csv_buffer.getvalue())
+            }
+        
+        if "export_files" in st.session_state:
+            parquet_data, csv_data = st.session_state.export_files["files"]
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("Download Parquet", parquet_data, file_name=f"{room_id}-submissions.parquet",
+                                   mime="application/octet-stream")
+            with col2:
+                st.download_button("Download CSV", csv_data, file_name=f"{room_id}-submissions.csv", mime="text/csv")
+        st.caption("Past events are archived under ./events; merge them with `python event_export.py merge OUT_DIR events/*`.")
+    
+    with st.expander("Rerun Profiler"):
+        show_profiler_panel()
+    
+    with st.expander("Submissions Browser"):
+        show_submissions_browser(room_id)
     
     with st.container():
         st.markdown("<div class='leaderboard'>", unsafe_allow_html=True)
         st.subheader("📊 Leaderboard")
         
-        leaderboard = load_leaderboard()
-        submissions = load_submissions()
+        leaderboard = load_leaderboard(room_id)
         
         if leaderboard:
             try:
@@ -722,28 +795,77 @@ def show_admin_page():
                     top_score = top_entries.iloc[0]['score']
                     st.info(f"**{top_name}** - Score: {top_score}")
                     
-                    if top_user_id in submissions:
-                        sub = submissions[top_user_id]
-                        with st.expander("View Winning Prompt"):
-                            st.write(sub["prompt"])
-                        with st.expander("View Response"):
-                            st.write(sub["response"])
-                        with st.expander("View Evaluation"):
-                            st.json(sub["evaluation"])
+                    sub = get_submission_index(room_id).get(top_user_id)
+                    if sub is not None:
+                        lazy_text_section("View Winning Prompt", sub, "prompt", key="top_prompt")
+                        lazy_text_section("View Response", sub, "response", key="top_response")
+                        if st.toggle("View Evaluation", key="top_evaluation"):
+                            evaluation = dict(sub["evaluation"])
+                            evaluation.pop("feedback_ref", None)
+                            evaluation["feedback"] = stored_text(sub["evaluation"], "feedback")
+                            st.json(evaluation)
             except Exception as e:
                 st.error(f"Error displaying leaderboard: {str(e)}")
         else:
             st.write("No submissions yet.")
         
         st.markdown("</div>", unsafe_allow_html=True)
+    
+    show_score_analytics(room_id)
 
-def show_user_page(username, user_id):
+def show_score_analytics(room_id):
+    stats = get_score_store(room_id).analytics()
+    
+    st.subheader("📈 Score Analytics")
+    if stats is None:
+        st.write("Analytics will appear after the first submission.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Submissions", stats["count"])
+    col2.metric("Mean Score", f"{stats['mean']:.1f}")
+    col3.metric("Std Dev", f"{stats['std']:.1f}")
+    col4.metric("Best Score", f"{stats['max']:.0f}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Score Distribution**")
+        counts, edges = stats["histogram"]
+        labels = [f"{int(low):02d}-{int(high):02d}" for low, high in zip(edges[:-1], edges[1:])]
+        st.bar_chart(pd.DataFrame({"Submissions": counts}, index=labels))
+        
+        st.write("**Percentiles**")
+        st.dataframe(
+            pd.DataFrame({
+                "Percentile": [f"p{p}" for p in stats["percentiles"]],
+                "Score": [round(float(v), 1) for v in stats["percentiles"].values()]
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+    with col2:
+        st.write("**Average Breakdown by Criterion**")
+        if stats["criterion_means"]:
+            st.bar_chart(pd.DataFrame({"Average": stats["criterion_means"]}))
+        
+        st.write("**Submissions per Minute**")
+        st.line_chart(pd.DataFrame({"Submissions": stats["per_minute"]}))
+    
+    st.write("**Score vs. Submit Time**")
+    st.scatter_chart(
+        pd.DataFrame({"Seconds since start": stats["elapsed"], "Score": stats["scores"]}),
+        x="Seconds since start",
+        y="Score"
+    )
+
+def show_user_page(room_id, username, user_id):
     
     st.markdown("<h1 class='header'>🥊 Prompt Battle Arena</h1>", unsafe_allow_html=True)
     
-    challenge_active, challenge_end_time = load_state()
+    challenge_active, challenge_end_time, challenge_id = load_state(room_id)
+    challenge = get_challenge(challenge_id)
     
-    if not challenge_active:
+    if not challenge_active or challenge is None:
         st.warning("Waiting for the admin to start the challenge...")
         st_autorefresh(interval=5000, key="user-autorefresh")
         st.markdown("<div class='waiting-screen'>", unsafe_allow_html=True)
@@ -758,89 +880,110 @@ def show_user_page(username, user_id):
         with st.container():
             st.markdown("<div class='challenge-card'>", unsafe_allow_html=True)
             
-            st.markdown(f"<h2>{data_extraction_challenge['name']}</h2>", unsafe_allow_html=True)
+            st.markdown(f"<h2>{challenge['name']}</h2>", unsafe_allow_html=True)
             
-            display_timer()
+            display_timer(room_id)
             
+            st.markdown(challenge['description'])
         
             st.markdown("**Data:**")
-            st.code(data_extraction_challenge['data'], language="text")
+            st.code(challenge['data'], language="text")
             
-            st.markdown("**Expected Output Format Example:**")
-            st.json({
-                "invoice_number": "example",
-                "date": "example date",
-                "customer_name": "example name",
-                "total_amount": "$000.00",
-                "line_items": [
-                    {"product": "item name", "quantity": 0, "unit_price": "$0.00", "total": "$0.00"}
-                ]
-            })
+            # The schema derived from expected_output would reveal the gold answer's structure
+            if "output_example" in challenge:
+                st.markdown("**Expected Output Format Example:**")
+                st.json(challenge["output_example"])
             
-            submissions = load_submissions()
+            status, _, sub = get_participant_registry(room_id).register(user_id)
+            controller = get_admission_controller(room_id)
+            job = controller.get(user_id)
+            if job is not None and job.payload["run_id"] != load_run_id(room_id):
+                job = None
             
             time_is_up = challenge_end_time and time.time() > challenge_end_time
+            submit_error = st.session_state.pop("submit_error", None)
+            if submit_error:
+                st.error(submit_error)
             
-            if user_id not in submissions and not time_is_up:
-                user_name = st.text_input("Your Name:", value=username)
-                user_prompt = st.text_area("Write your prompt here:", 
-                             help="Create a prompt that will instruct the AI to extract data from the invoice in the correct format.",
-                             height=150,
-                             placeholder="Write a detailed prompt that will make the AI extract the invoice data correctly...")
+            if status == SUBMITTED:
+                eval_result = sub["evaluation"]
                 
-                submit_button = st.button("Submit Prompt")
-                if submit_button:
-                    success = submit_prompt(user_id, user_name, user_prompt)
-                    if success:
-                        st.rerun()
-            else:
-                if user_id in submissions:
-                    sub = submissions[user_id]
-                    eval_result = sub["evaluation"]
-                    
-                    st.success(f"Your submission has been received! Your score: {eval_result['total_score']}/100")
+                st.success(f"Your submission has been received! Your score: {eval_result['total_score']}/100")
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    lazy_text_section("Your Prompt", sub, "prompt", key="own_prompt")
                     
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        with st.expander("Your Prompt"):
-                            st.write(sub["prompt"])
-                        
-                        with st.expander("AI Response"):
-                            st.code(sub["response"], language="json")
+                    lazy_text_section("AI Response", sub, "response", key="own_response",
+                                      render=lambda text: st.code(text, language="json"))
+                
+                with col2:
+                    with st.expander("Score Breakdown"):
+                        for category, score in eval_result["breakdown"].items():
+                            st.markdown(f"**{category.title()}**: {score} points")
                     
-                    with col2:
-                        with st.expander("Score Breakdown"):
-                            for category, score in eval_result["breakdown"].items():
-                                st.markdown(f"**{category.title()}**: {score} points")
-                        
-                        with st.expander("Feedback"):
-                            st.write(eval_result["feedback"])
-                elif time_is_up:
-                    st.error("Time's up! You can no longer submit a prompt for this challenge.")
+                    lazy_text_section("Feedback", eval_result, "feedback", key="own_feedback")
+            elif job is not None and job.status in (QUEUED, RUNNING):
+                st_autorefresh(interval=2000, key="queue-autorefresh")
+                wait = int(math.ceil(controller.estimated_wait(job)))
+                if job.status == QUEUED:
+                    st.info(f"Your prompt was accepted and is number {controller.position(job)} in the queue. "
+                            f"Estimated wait: about {wait} seconds.")
+                else:
+                    st.info(f"Your prompt is being processed and evaluated. Estimated wait: about {wait} seconds.")
+                st.markdown("<div class='spinner'></div>", unsafe_allow_html=True)
+            elif time_is_up:
+                st.error("Time's up! You can no longer submit a prompt for this challenge.")
+            else:
+                if job is not None and job.status == FAILED:
+                    st.error(f"Error processing submission: {job.error}")
+                
+                st.text_input("Your Name:", value=username, key="submit_name")
+                st.text_area("Write your prompt here:", 
+                             help="Create a prompt that will instruct the AI to solve the challenge in the correct format.",
+                             height=150,
+                             placeholder="Write a detailed prompt that will make the AI produce the expected output...",
+                             key="submit_prompt")
+                
+                st.button("Submit Prompt", on_click=submit_from_form, args=(room_id, challenge, user_id))
             
             st.markdown("</div>", unsafe_allow_html=True)
             
+def current_session_type():
+    """Classify this rerun as an admin, active user or waiting user session"""
+    params = st.experimental_get_query_params()
+    if params.get('admin', [''])[0] == 'true':
+        return "admin"
+    challenge_active, _, _ = load_state(normalize_room_id(params.get('room', [DEFAULT_ROOM])[0]))
+    return "user" if challenge_active else "waiting"
+
 def main():
+    with get_rerun_profiler().profile(current_session_type):
+        run_app()
+
+def run_app():
     setup_gemini_api()
+    get_challenge_registry()
     
-    if not os.path.exists(STATE_FILE):
-        save_state(False, None)
-    if not os.path.exists(LEADERBOARD_FILE):
-        save_leaderboard([])
-    if not os.path.exists(SUBMISSIONS_FILE):
-        save_submissions({})
+    params = st.experimental_get_query_params()
+    is_admin = params.get('admin', [''])[0] == 'true'
+    room_id = normalize_room_id(params.get('room', [DEFAULT_ROOM])[0])
+    
+    if not os.path.exists(room_file(room_id, STATE_FILE)):
+        save_state(room_id, False, None)
+    if not os.path.exists(room_file(room_id, LEADERBOARD_FILE)):
+        save_leaderboard(room_id, [])
+    if not os.path.exists(room_file(room_id, SUBMISSIONS_FILE)):
+        save_submissions(room_id, {})
     
     if 'username_input' not in st.session_state:
         st.session_state.username_input = ""
     
     if 'user_id' not in st.session_state:
-        session_id = str(time.time())
-        st.session_state.user_id = hashlib.md5(session_id.encode()).hexdigest()
-    
-    params = st.experimental_get_query_params()
-    is_admin = params.get('admin', [''])[0] == 'true'
+        st.session_state.user_id = uuid.uuid4().hex
     
     st.sidebar.title("🥊 Prompt Battle Arena")
+    st.sidebar.caption(f"Room: {room_id}")
     
     if not is_admin:
         admin_expander = st.sidebar.expander("Admin Access")
@@ -848,21 +991,29 @@ def main():
             admin_password = st.text_input("Admin Password", type="password", key="admin_pwd")
             admin_login = st.button("Login as Admin")
             if admin_login and admin_password == "admin123":  
-                st.experimental_set_query_params(admin='true')
+                st.experimental_set_query_params(admin='true', room=room_id)
                 st.rerun()
     
     if is_admin:
         st.sidebar.success("Logged in as Admin")
         logout_button = st.sidebar.button("Logout")
         if logout_button:
-            st.experimental_set_query_params()
+            st.experimental_set_query_params(room=room_id)
             st.rerun()
-        show_admin_page()
+        
+        with st.sidebar.expander("Rooms"):
+            rooms = list_rooms()
+            st.write(", ".join(rooms) if rooms else "No rooms yet.")
+            new_room = st.text_input("Open room", value=room_id, key="room_input")
+            if st.button("Go to Room") and normalize_room_id(new_room) != room_id:
+                st.experimental_set_query_params(admin='true', room=normalize_room_id(new_room))
+                st.rerun()
+        show_admin_page(room_id)
     else:
         if not st.session_state.username_input:
             st.session_state.username_input = st.sidebar.text_input("Enter Your Name:")
         
-        show_user_page(st.session_state.username_input, st.session_state.user_id)
+        show_user_page(room_id, st.session_state.username_input, st.session_state.user_id)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
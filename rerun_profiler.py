@@ -0,0 +1,162 @@
+import cProfile, os, pstats, threading, time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILES_DIR = "./profiles"
+
+def function_label(func):
+    """Readable name for a pstats function key"""
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+class RerunProfiler:
+    """Process-wide profiler that records every script rerun while enabled.
+
+    Wall times and the top functions of each rerun go into a ring buffer;
+    full cProfile statistics are aggregated per session type so they can be
+    rendered or dumped as pstats files.
+    """
+
+    def __init__(self, capacity=500, top_n=10, dump_dir=PROFILES_DIR):
+        self.enabled = False
+        self.top_n = top_n
+        self.dump_dir = dump_dir
+        self.runs = deque(maxlen=capacity)
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def profile(self, session_type):
+        """Profile the enclosed block as one rerun of the given session type.
+
+        `session_type` may be a callable; it is only called while profiling is
+        enabled, so classifying the rerun costs nothing when profiling is off.
+        """
+        if not self.enabled:
+            yield
+            return
+        if callable(session_type):
+            session_type = session_type()
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another rerun holds the interpreter-wide profiler; record wall time only
+            profiler = None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+            self.record(session_type, wall, profiler)
+
+    def record(self, session_type, wall, profiler=None):
+        """Add one rerun to the ring buffer and the per-type aggregate"""
+        top = []
+        stats = None
+        if profiler is not None:
+            stats = pstats.Stats(profiler)
+            entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+            top = [(function_label(func), tt, ct, nc) for func, (cc, nc, tt, ct, callers) in entries[:self.top_n]]
+
+        with self.lock:
+            self.runs.append({
+                "time": time.time(),
+                "session_type": session_type,
+                "wall_ms": wall * 1000,
+                "top": top
+            })
+            if stats is not None:
+                if session_type in self.stats:
+                    self.stats[session_type].add(stats)
+                else:
+                    self.stats[session_type] = stats
+
+    def clear(self):
+        with self.lock:
+            self.runs.clear()
+            self.stats = {}
+
+    def summary(self):
+        """Rerun count and wall time percentiles per session type"""
+        with self.lock:
+            runs = list(self.runs)
+
+        walls = {}
+        for run in runs:
+            walls.setdefault(run["session_type"], []).append(run["wall_ms"])
+
+        rows = []
+        for session_type, values in sorted(walls.items()):
+            values.sort()
+            rows.append({
+                "session_type": session_type,
+                "reruns": len(values),
+                "mean_ms": sum(values) / len(values),
+                "p50_ms": values[len(values) // 2],
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max_ms": values[-1]
+            })
+        return rows
+
+    def top_functions(self, session_type, sort_key="tottime"):
+        """Top functions for a session type, aggregated over all recorded reruns"""
+        with self.lock:
+            stats = self.stats.get(session_type)
+            if stats is None:
+                return []
+            index = 2 if sort_key == "tottime" else 3
+            entries = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)
+            return [
+                {"function": function_label(func), "calls": nc, "tottime_ms": tt * 1000, "cumtime_ms": ct * 1000}
+                for func, (cc, nc, tt, ct, callers) in entries[:self.top_n]
+            ]
+
+    def flame_lines(self, session_type, max_depth=6, min_fraction=0.02, width=40):
+        """Render the aggregated call tree as an icicle chart of text bars"""
+        with self.lock:
+            stats = self.stats.get(session_type)
+            if stats is None:
+                return []
+            entries = dict(stats.stats)
+
+        callees = {}
+        for func, (cc, nc, tt, ct, callers) in entries.items():
+            for caller, caller_stats in callers.items():
+                callees.setdefault(caller, []).append((func, caller_stats[3]))
+
+        roots = [(func, data[3]) for func, data in entries.items() if not data[4]]
+        total = sum(ct for _, ct in roots) or 1.0
+        lines = []
+
+        def walk(func, cumtime, depth, path):
+            fraction = cumtime / total
+            if fraction < min_fraction or depth > max_depth or func in path:
+                return
+            bar = "█" * max(1, int(fraction * width))
+            lines.append(f"{'  ' * depth}{bar} {fraction * 100:5.1f}% {cumtime * 1000:8.1f} ms  {function_label(func)}")
+            for child, child_time in sorted(callees.get(func, []), key=lambda item: item[1], reverse=True):
+                # Edge times are not stack-aware, so never show a child wider than its parent
+                walk(child, min(child_time, cumtime), depth + 1, path | {func})
+
+        for func, cumtime in sorted(roots, key=lambda item: item[1], reverse=True):
+            walk(func, cumtime, 0, frozenset())
+        return lines
+
+    def dump(self):
+        """Write aggregated statistics for every session type as .pstats files"""
+        os.makedirs(self.dump_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        paths = []
+        with self.lock:
+            for session_type, stats in self.stats.items():
+                path = os.path.join(self.dump_dir, f"{session_type}-{stamp}.pstats")
+                stats.dump_stats(path)
+                paths.append(path)
+        return paths
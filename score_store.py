@@ -0,0 +1,83 @@
+import threading
+import numpy as np
+
+class ScoreColumns:
+    """Growable NumPy column store of scores, submit times and per-criterion breakdowns.
+
+    Appends are amortised O(1); analytics read a consistent prefix of the
+    columns under the lock and compute with vectorised NumPy operations.
+    """
+
+    def __init__(self, criteria=(), started_at=None, capacity=256):
+        self.lock = threading.Lock()
+        self.reset(criteria, started_at, capacity)
+
+    def reset(self, criteria=(), started_at=None, capacity=256):
+        with self.lock:
+            self.criteria = list(criteria)
+            self.started_at = started_at
+            self.size = 0
+            self.scores = np.empty(capacity, dtype=np.float64)
+            self.submitted_at = np.empty(capacity, dtype=np.float64)
+            self.breakdown = np.full((capacity, len(self.criteria)), np.nan, dtype=np.float64)
+
+    def _grow(self):
+        capacity = len(self.scores) * 2
+        self.scores = np.resize(self.scores, capacity)
+        self.submitted_at = np.resize(self.submitted_at, capacity)
+        breakdown = np.full((capacity, len(self.criteria)), np.nan, dtype=np.float64)
+        breakdown[:self.size] = self.breakdown[:self.size]
+        self.breakdown = breakdown
+
+    def append(self, score, submitted_at, breakdown=None):
+        """Add one submission's score, epoch submit time and breakdown dict"""
+        breakdown = breakdown or {}
+        with self.lock:
+            if self.size == len(self.scores):
+                self._grow()
+            row = self.size
+            self.scores[row] = score
+            self.submitted_at[row] = submitted_at
+            for column, name in enumerate(self.criteria):
+                try:
+                    self.breakdown[row, column] = float(breakdown[name])
+                except (KeyError, TypeError, ValueError):
+                    self.breakdown[row, column] = np.nan
+            if self.started_at is None or submitted_at < self.started_at:
+                self.started_at = submitted_at
+            self.size += 1
+
+    def snapshot(self):
+        """Copy the filled part of every column so analytics run without the lock"""
+        with self.lock:
+            n = self.size
+            return (self.scores[:n].copy(), self.submitted_at[:n].copy(),
+                    self.breakdown[:n].copy(), list(self.criteria), self.started_at)
+
+    def analytics(self, bins=10, percentiles=(10, 25, 50, 75, 90)):
+        """Histogram, percentiles, criterion means and submission rate over all scores"""
+        scores, submitted_at, breakdown, criteria, started_at = self.snapshot()
+        if len(scores) == 0:
+            return None
+
+        counts, edges = np.histogram(scores, bins=bins, range=(0, 100))
+        elapsed = submitted_at - (started_at if started_at is not None else submitted_at.min())
+        minutes = np.floor(elapsed / 60).astype(np.int64)
+        per_minute = np.bincount(np.clip(minutes, 0, None))
+
+        filled = ~np.isnan(breakdown)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            criterion_means = np.where(filled, breakdown, 0).sum(axis=0) / filled.sum(axis=0)
+
+        return {
+            "count": len(scores),
+            "mean": float(scores.mean()),
+            "std": float(scores.std()),
+            "max": float(scores.max()),
+            "histogram": (counts, edges),
+            "percentiles": dict(zip(percentiles, np.percentile(scores, percentiles))),
+            "criterion_means": dict(zip(criteria, criterion_means)),
+            "per_minute": per_minute,
+            "elapsed": elapsed,
+            "scores": scores
+        }
@@ -0,0 +1,56 @@
+import hashlib, json, threading
+from concurrent.futures import Future
+
+def request_key(model, config, prompt):
+    """Stable key for an API request made of the model, its config and the prompt text"""
+    payload = json.dumps({"model": model, "config": config, "prompt": prompt}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still in flight wait on the same future and receive its result or
+    exception. Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.calls = 0
+        self.executed = 0
+        self.collapsed = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            self.calls += 1
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.inflight[key] = future
+                self.executed += 1
+            else:
+                self.collapsed += 1
+
+        if leader:
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                # Followers must never wait on a future that is left unresolved
+                future.set_exception(e)
+                if not isinstance(e, Exception):
+                    raise
+            finally:
+                with self.lock:
+                    del self.inflight[key]
+        return future.result()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "executed": self.executed,
+                "collapsed": self.collapsed,
+                "in_flight": len(self.inflight)
+            }
@@ -0,0 +1,82 @@
+import bisect, itertools, threading
+
+class SubmissionIndex:
+    """In-memory search index over a room's submissions.
+
+    Entries are kept ordered by score (highest first) so score ranges are
+    answered with two bisections; name and prompt filters run as substring
+    checks over pre-lowercased text within that range. Only the requested
+    page of summary rows leaves the index.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.keys = []
+            self.entries = []
+            self.positions = {}
+            self.sequence = itertools.count()
+
+    def add(self, user_id, record, prompt_text, score):
+        """Insert or replace a submission summary"""
+        entry = {
+            "user_id": user_id,
+            "name": record.get("name", ""),
+            "score": score,
+            "timestamp": record.get("timestamp", ""),
+            "prompt_preview": " ".join((prompt_text or "").split())[:120],
+            "search_name": (record.get("name") or "").lower(),
+            "search_prompt": (prompt_text or "").lower(),
+            "record": record
+        }
+        with self.lock:
+            if user_id in self.positions:
+                self._remove(user_id)
+            key = (-score, next(self.sequence))
+            index = bisect.bisect_left(self.keys, key)
+            self.keys.insert(index, key)
+            self.entries.insert(index, entry)
+            self.positions[user_id] = key
+
+    def _remove(self, user_id):
+        key = self.positions.pop(user_id)
+        index = bisect.bisect_left(self.keys, key)
+        del self.keys[index]
+        del self.entries[index]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, user_id):
+        """Full submission record for a user, or None"""
+        with self.lock:
+            key = self.positions.get(user_id)
+            if key is None:
+                return None
+            return self.entries[bisect.bisect_left(self.keys, key)]["record"]
+
+    def query(self, name="", prompt="", min_score=0, max_score=100, page=1, page_size=25):
+        """Filter, then return (total matches, summary rows of the requested page)"""
+        name, prompt = name.strip().lower(), prompt.strip().lower()
+        with self.lock:
+            start = bisect.bisect_left(self.keys, (-max_score, -1))
+            end = bisect.bisect_right(self.keys, (-min_score, float("inf")))
+            candidates = self.entries[start:end]
+
+        if name or prompt:
+            candidates = [
+                entry for entry in candidates
+                if name in entry["search_name"] and prompt in entry["search_prompt"]
+            ]
+
+        # A page past the end (e.g. after filters narrowed the matches) shows the last page
+        last_page = max(1, -(-len(candidates) // page_size))
+        offset = (min(max(page, 1), last_page) - 1) * page_size
+        rows = [
+            {key: entry[key] for key in ("user_id", "name", "score", "timestamp", "prompt_preview")}
+            for entry in candidates[offset:offset + page_size]
+        ]
+        return len(candidates), rows